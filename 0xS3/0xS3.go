@@ -3,11 +3,13 @@ package main
 import (
 	"bufio"
 	"bytes"
+	"context"
 	"crypto/tls"
 	"encoding/xml"
 	"flag"
 	"fmt"
 	"io"
+	"net"
 	"net/http"
 	"net/url"
 	"os"
@@ -15,6 +17,7 @@ import (
 	"os/signal"
 	"path/filepath"
 	"regexp"
+	"runtime"
 	"sort"
 	"strconv"
 	"strings"
@@ -28,26 +31,31 @@ import (
 
 const testFilename = "Bug-Bounty-From-Production-Exploiter.txt"
 
-var awsRegions = []string{
+var publicRegions = []string{
 	"us-east-1", "us-east-2", "us-west-1", "us-west-2",
 	"af-south-1", "ap-east-1", "ap-southeast-1", "ap-southeast-2",
 	"ap-southeast-3", "ap-northeast-1", "ap-northeast-2", "ap-northeast-3",
 	"ap-south-1", "ca-central-1",
-	"cn-north-1", "cn-northwest-1",
 	"eu-central-1", "eu-west-1", "eu-west-2", "eu-west-3",
 	"eu-north-1", "eu-south-1",
 	"me-south-1", "me-central-1",
 	"sa-east-1",
+}
+
+// restrictedRegions are isolated partitions (China, GovCloud, ISO) that are
+// unreachable from ordinary networks; probes there mostly just time out, so
+// they are only scanned with -a/--all-regions.
+var restrictedRegions = []string{
+	"cn-north-1", "cn-northwest-1",
 	"us-gov-east-1", "us-gov-west-1",
 	"us-iso-east-1", "us-iso-west-1", "us-isob-east-1",
 }
 
-var (
-	totalRe    = regexp.MustCompile(`Total\s+Objects:\s+(\d+)`)
-	errInParen = regexp.MustCompile(`\(([^)]+)\)`)
-	// lsLineRe parses a line of `aws s3 ls --recursive` output: date time size key.
-	lsLineRe = regexp.MustCompile(`^\S+\s+\S+\s+(\d+)\s+(.*)$`)
-)
+// awsRegions is the set actually scanned, chosen in main.
+var awsRegions = publicRegions
+
+// lsLineRe parses a line of `aws s3 ls --recursive` output: date time size key.
+var lsLineRe = regexp.MustCompile(`^\S+\s+\S+\s+(\d+)\s+(.*)$`)
 
 // ────────────────────────── bucket access record
 
@@ -85,6 +93,13 @@ type S3CommonPrefix struct {
 	Prefix string `xml:"Prefix"`
 }
 
+// S3Error is the XML error document S3 returns on failed requests.
+type S3Error struct {
+	XMLName xml.Name `xml:"Error"`
+	Code    string   `xml:"Code"`
+	Message string   `xml:"Message"`
+}
+
 // ────────────────────────── shell state
 
 type ShellState struct {
@@ -104,8 +119,24 @@ var (
 	flagNameVar bool
 	flagVerbose bool
 	flagThreads int
+	flagExhaust bool
+	flagAllRegs bool
+	flagRootDom bool
+	flagTestMsg string
+	flagNoDel   bool
+	flagNoWrite bool
+	flagVarFile string
 )
 
+// defaultThreads sizes the web worker pool when -t is not given. Probes spend
+// nearly all their time waiting on the network, so the pool is far larger than
+// the core count; past 32 workers per core, TLS handshakes start to compete for
+// CPU. The result stays within 128..256, so small hosts still keep enough
+// requests in flight to hide S3's latency.
+func defaultThreads() int {
+	return min(256, max(128, runtime.NumCPU()*32))
+}
+
 // ────────────────────────── runtime state
 
 var (
@@ -114,6 +145,10 @@ var (
 	baseBuckets   []string
 	baseName      string
 	allVariations []string
+	// planRegions[i] is the region list allVariations[i] is probed in, fixed
+	// by planScan after discovery so both phases and their progress totals
+	// work from the same plan even if a probe learns a region mid-scan.
+	planRegions [][]string
 
 	testContent string
 	testPut     = true
@@ -121,17 +156,26 @@ var (
 
 	mu           sync.Mutex
 	stopAll      atomic.Bool
-	checkedSet   = make(map[string]bool)
-	foundBuckets = make(map[string]map[string]bool)
+	foundBuckets = make(map[string]map[string]bool) // owned by the reporter during the scan
+	// Read by every web job, written only on rare discoveries, so these are
+	// sync.Maps: the per-URL lookups never contend on mu with console output.
+	bucketRegion sync.Map // bucket -> region reported by S3
+	resolved     sync.Map // buckets with a listable endpoint
+	denied       sync.Map // buckets S3 refused to list on some endpoint
 
-	accessList []BucketAccess
-	accessMu   sync.Mutex
+	accessList []BucketAccess // owned by the reporter during the scan
 
 	sigCh chan os.Signal // package-level for signal handler swap
 
-	tmpDir       string
-	testFilePath string
-	httpClient   *http.Client
+	// scanCtx is cancelled by the first Ctrl+C so in-flight scan requests abort
+	// at once and the scan unwinds normally instead of waiting out timeouts.
+	scanCtx    = context.Background()
+	cancelScan = func() {}
+
+	tmpMu      sync.Mutex
+	tmpDir     string // created lazily by ensureTmpDir (guarded by tmpMu)
+	httpClient *http.Client
+	scanClient *http.Client // httpClient's pool, but never follows redirects
 )
 
 // ────────────────────────── console helpers
@@ -145,15 +189,78 @@ func logMsg(msg string, showAlways bool) {
 	}
 }
 
-func progressCounter(current, total int) {
+// progressTask is one phase's counter on the status line.
+type progressTask struct {
+	label string
+	done  *atomic.Int64
+	total int
+}
+
+// progressTasks are the phases currently reporting (guarded by mu). The CLI
+// and web phases run side by side, so they share one status line instead of
+// overwriting each other's count on every tick.
+var progressTasks []*progressTask
+
+func progressCounter() {
 	mu.Lock()
-	fmt.Fprintf(os.Stdout, "\r%-80s\r[%d/%d] Checking...", "", current, total)
+	var sb strings.Builder
+	for _, t := range progressTasks {
+		if len(progressTasks) == 1 {
+			fmt.Fprintf(&sb, "[%d/%d] ", t.done.Load(), t.total)
+		} else {
+			fmt.Fprintf(&sb, "[%s %d/%d] ", t.label, t.done.Load(), t.total)
+		}
+	}
+	fmt.Fprintf(os.Stdout, "\r%-80s\r%sChecking...", "", sb.String())
 	mu.Unlock()
 }
 
-func markFound(bucket, region string) {
+// startProgress reports done/total from a single ticker goroutine, so workers
+// only bump an atomic counter instead of taking the console lock after every
+// job. label names the phase when more than one is reporting. The returned
+// stop func prints the final count, waits for the printer and takes the
+// phase off the status line.
+func startProgress(label string, done *atomic.Int64, total int) (stop func()) {
+	task := &progressTask{label: label, done: done, total: total}
 	mu.Lock()
-	defer mu.Unlock()
+	progressTasks = append(progressTasks, task)
+	mu.Unlock()
+	quit := make(chan struct{})
+	finished := make(chan struct{})
+	go func() {
+		defer close(finished)
+		t := time.NewTicker(100 * time.Millisecond)
+		defer t.Stop()
+		last := int64(-1)
+		for {
+			select {
+			case <-quit:
+				progressCounter()
+				return
+			case <-t.C:
+				if d := done.Load(); d != last {
+					last = d
+					progressCounter()
+				}
+			}
+		}
+	}()
+	return func() {
+		close(quit)
+		<-finished
+		mu.Lock()
+		for i, t := range progressTasks {
+			if t == task {
+				progressTasks = append(progressTasks[:i], progressTasks[i+1:]...)
+				break
+			}
+		}
+		mu.Unlock()
+	}
+}
+
+// markFound is only called from the reporter goroutine (see startReporter).
+func markFound(bucket, region string) {
 	if bucket != "" {
 		if foundBuckets[bucket] == nil {
 			foundBuckets[bucket] = make(map[string]bool)
@@ -164,115 +271,341 @@ func markFound(bucket, region string) {
 	}
 }
 
-func ensureTestFile() {
-	_ = os.WriteFile(testFilePath, []byte(testContent), 0644)
+// ensureTmpDir creates the scratch directory on first use; scans never touch
+// the filesystem, only the shell's edit command does.
+func ensureTmpDir() (string, error) {
+	tmpMu.Lock()
+	defer tmpMu.Unlock()
+	if tmpDir == "" {
+		d, err := os.MkdirTemp("", "s3chk_")
+		if err != nil {
+			return "", err
+		}
+		tmpDir = d
+	}
+	return tmpDir, nil
+}
+
+// cleanup releases process resources in one fixed order for every exit path
+// (normal return, Ctrl+C during the scan, Ctrl+C in the shell): pooled
+// keep-alive connections are closed first, then the temp directory is removed.
+func cleanup() {
+	if httpClient != nil {
+		httpClient.CloseIdleConnections()
+	}
+	tmpMu.Lock()
+	if tmpDir != "" {
+		os.RemoveAll(tmpDir)
+		tmpDir = ""
+	}
+	tmpMu.Unlock()
 }
 
-func recordAccess(a BucketAccess) {
-	accessMu.Lock()
-	accessList = append(accessList, a)
-	accessMu.Unlock()
+// ────────────────────────── findings reporter
+
+// finding is one hit handed from a probe worker to the reporter. A finding
+// with an empty access.Bucket is a miss: only its line is printed.
+type finding struct {
+	access BucketAccess
+	region string // region label recorded in foundBuckets ("" for web)
+	line   string // console line announcing the hit
+}
+
+var findings chan finding
+
+// startReporter runs the one goroutine that owns foundBuckets, accessList and
+// scan output for the duration of the scan. Workers hand hits and misses over
+// a channel instead of each taking the state and console locks in turn, and
+// lines from concurrent workers can never interleave on screen. Whatever is
+// queued when the reporter wakes is printed in one write, so a verbose scan
+// costs one console lock per burst rather than per line. stop drains the
+// queue; after it returns, main reads the results without locking.
+func startReporter() (stop func()) {
+	findings = make(chan finding, 64)
+	done := make(chan struct{})
+	go func() {
+		defer close(done)
+		var lines []string
+		for f := range findings {
+			lines = lines[:0]
+			for more := true; more; {
+				if f.access.Bucket != "" {
+					markFound(f.access.Bucket, f.region)
+					accessList = append(accessList, f.access)
+				}
+				lines = append(lines, f.line)
+				select {
+				case f, more = <-findings:
+				default:
+					more = false
+				}
+			}
+			logMsg(strings.Join(lines, "\n"), true)
+		}
+	}()
+	return func() {
+		close(findings)
+		<-done
+	}
 }
 
 // ────────────────────────── name variations
 
-func bucketVariations(b string) []string {
+// addBucketVariations feeds every variation of b to add, in priority order.
+// The name rewrites are computed once up front rather than inline per entry.
+func addBucketVariations(add func(...string), b string) {
 	dotDash := strings.ReplaceAll(b, ".", "-")
-	v := []string{
-		b,
-		"www." + b, b + "-www",
-		b + ".com", "www." + b + ".com",
-		b + "-com", "www-" + b + "-com",
-		b + "-dev", b + "-staging", b + "-test", b + "-qa", b + "-prod",
-		"dev-" + b, "staging-" + b, "test-" + b, "qa-" + b, "prod-" + b,
-		b + "-logs", b + "-backups", b + "-archive", b + "-resources",
-		b + "-files", b + "-images", b + "-static", b + "-uploads",
-		b + "-cdn", b + "-content", b + "-assets", b + "-config",
-		b + "-data", b + "-api",
-		"cdn-" + b, "files-" + b, "uploads-" + b, "static-" + b,
-		"assets-" + b, "logs-" + b, "backups-" + b, "archive-" + b,
-		"resources-" + b,
-		"s1-" + b, "s2-" + b, "s3-" + b,
-		b + "-s1", b + "-s2", b + "-s3",
-		"s3-" + b,
-		strings.ReplaceAll(b, "_", "-"),
-		strings.ReplaceAll(b, "-", "_"),
-		b + "-app", "app-" + b,
-		b + "-service", "service-" + b,
-		b + "-storage", b + "-dist",
-		b + "-v1", b + "-v2", b + "-old", b + "-new",
-		"v1-" + b, "v2-" + b,
-		b + ".com-dev", b + ".com-test", b + ".com-prod",
-		"dev-" + b + ".com", "test-" + b + ".com", "prod-" + b + ".com",
-		dotDash,
-		"www-" + dotDash,
-		dotDash + "-dev", dotDash + "-prod",
-		dotDash + "-logs", dotDash + "-assets",
-	}
-	seen := make(map[string]bool, len(v))
-	out := make([]string, 0, len(v))
-	for _, s := range v {
-		if !seen[s] {
-			seen[s] = true
-			out = append(out, s)
+	underDash := strings.ReplaceAll(b, "_", "-")
+	dashUnder := strings.ReplaceAll(b, "-", "_")
+	add(b,
+		"www."+b, b+"-www",
+		b+".com", "www."+b+".com",
+		b+"-com", "www-"+b+"-com")
+	add(b+"-dev", b+"-staging", b+"-test", b+"-qa", b+"-prod",
+		"dev-"+b, "staging-"+b, "test-"+b, "qa-"+b, "prod-"+b)
+	add(b+"-logs", b+"-backups", b+"-archive", b+"-resources",
+		b+"-files", b+"-images", b+"-static", b+"-uploads",
+		b+"-cdn", b+"-content", b+"-assets", b+"-config",
+		b+"-data", b+"-api",
+		"cdn-"+b, "files-"+b, "uploads-"+b, "static-"+b,
+		"assets-"+b, "logs-"+b, "backups-"+b, "archive-"+b,
+		"resources-"+b)
+	add("s1-"+b, "s2-"+b, "s3-"+b,
+		b+"-s1", b+"-s2", b+"-s3",
+		underDash,
+		dashUnder,
+		b+"-app", "app-"+b,
+		b+"-service", "service-"+b,
+		b+"-storage", b+"-dist",
+		b+"-v1", b+"-v2", b+"-old", b+"-new",
+		"v1-"+b, "v2-"+b)
+	add(b+".com-dev", b+".com-test", b+".com-prod",
+		"dev-"+b+".com", "test-"+b+".com", "prod-"+b+".com")
+	add(dotDash,
+		"www-"+dotDash,
+		dotDash+"-dev", dotDash+"-prod",
+		dotDash+"-logs", dotDash+"-assets")
+}
+
+// variationPatterns, when loaded from -f/--variations-file, replaces the
+// built-in list: each pattern is split around its {b} placeholders once, so a
+// variation costs only the joins.
+var variationPatterns [][]string
+
+func loadVariationPatterns(path string) [][]string {
+	lines := readListFile(path, "variation patterns")
+	pats := make([][]string, 0, len(lines))
+	for _, l := range lines {
+		if !strings.Contains(l, "{b}") {
+			fmt.Printf("Error: Pattern '%s' in '%s' has no {b} placeholder.\n", l, path)
+			os.Exit(1)
 		}
+		pats = append(pats, strings.Split(l, "{b}"))
+	}
+	return pats
+}
+
+// addPatternVariations feeds b itself, then every loaded pattern applied to b.
+func addPatternVariations(add func(...string), b string) {
+	add(b)
+	for _, p := range variationPatterns {
+		add(strings.Join(p, b))
 	}
-	return out
 }
 
 func buildVariations() []string {
-	if flagNameVar {
-		var all []string
-		for _, b := range baseBuckets {
-			all = append(all, bucketVariations(b)...)
-		}
-		seen := make(map[string]bool, len(all))
-		out := make([]string, 0, len(all))
-		for _, s := range all {
-			if !seen[s] {
-				seen[s] = true
+	if !flagNameVar {
+		return baseBuckets
+	}
+	// One seen-set across all base names: variations are deduplicated as they
+	// are generated, with no intermediate list and no second pass.
+	seen := make(map[string]struct{}, len(baseBuckets)*80)
+	out := make([]string, 0, len(baseBuckets)*80)
+	add := func(vs ...string) {
+		for _, s := range vs {
+			if _, dup := seen[s]; !dup {
+				seen[s] = struct{}{}
 				out = append(out, s)
 			}
 		}
-		return out
 	}
-	return baseBuckets
+	gen := addBucketVariations
+	if variationPatterns != nil {
+		gen = addPatternVariations
+	}
+	for _, b := range baseBuckets {
+		gen(add, b)
+	}
+	return out
 }
 
 // ────────────────────────── endpoint generation
 
-func buildEndpoints(bucket, region string) []string {
-	var urls []string
-	for _, proto := range []string{"http", "https"} {
-		urls = append(urls, proto+"://"+bucket)
-		if region == "" {
-			urls = append(urls,
-				fmt.Sprintf("%s://%s.s3.amazonaws.com", proto, bucket),
-				fmt.Sprintf("%s://s3.amazonaws.com/%s", proto, bucket),
-			)
-		} else {
-			urls = append(urls,
-				fmt.Sprintf("%s://%s.s3.%s.amazonaws.com", proto, bucket, region),
-				fmt.Sprintf("%s://s3.%s.amazonaws.com/%s", proto, region, bucket),
-				fmt.Sprintf("%s://%s.s3-%s.amazonaws.com", proto, bucket, region),
-				fmt.Sprintf("%s://s3-%s.amazonaws.com/%s", proto, region, bucket),
-				fmt.Sprintf("%s://%s.s3-website.%s.amazonaws.com", proto, bucket, region),
-				fmt.Sprintf("%s://s3-website.%s.amazonaws.com/%s", proto, region, bucket),
-				fmt.Sprintf("%s://s3-website-%s.amazonaws.com/%s", proto, region, bucket),
-				fmt.Sprintf("%s://%s.s3-website-%s.amazonaws.com", proto, bucket, region),
-				fmt.Sprintf("%s://%s.s3.dualstack.%s.amazonaws.com", proto, bucket, region),
-				fmt.Sprintf("%s://s3.dualstack.%s.amazonaws.com/%s", proto, region, bucket),
-			)
+// rootDomainTmpl probes the bucket name itself as a hostname. That only reaches
+// S3 when the name is a domain CNAMEd to a bucket; for everything else it is a
+// failed DNS lookup or an unrelated site, so it is opt-in via
+// -d/--probe-root-domain, which prepends it to the global set.
+const rootDomainTmpl = "%[1]s://%[2]s"
+
+// Endpoint templates, formatted once per scheme and region by makeEndpointForms:
+// %[1]s = scheme, %[2]s = bucket, %[3]s = region.
+var (
+	globalEndpointTmpls = []string{
+		"%[1]s://%[2]s.s3.amazonaws.com",
+		"%[1]s://s3.amazonaws.com/%[2]s",
+	}
+	regionalEndpointTmpls = []string{
+		"%[1]s://%[2]s.s3.%[3]s.amazonaws.com",
+		"%[1]s://s3.%[3]s.amazonaws.com/%[2]s",
+		"%[1]s://%[2]s.s3-%[3]s.amazonaws.com",
+		"%[1]s://s3-%[3]s.amazonaws.com/%[2]s",
+		"%[1]s://%[2]s.s3-website.%[3]s.amazonaws.com",
+		"%[1]s://s3-website.%[3]s.amazonaws.com/%[2]s",
+		"%[1]s://s3-website-%[3]s.amazonaws.com/%[2]s",
+		"%[1]s://%[2]s.s3-website-%[3]s.amazonaws.com",
+		"%[1]s://%[2]s.s3.dualstack.%[3]s.amazonaws.com",
+		"%[1]s://s3.dualstack.%[3]s.amazonaws.com/%[2]s",
+	}
+)
+
+// endpointForm is one endpoint template pre-formatted for a scheme and region,
+// split around the bucket name so a URL costs a single concatenation.
+type endpointForm struct {
+	pre, suf string
+	secure   bool // https
+	website  bool // static-website endpoint: read-only, no write tests
+	custom   bool // rootDomainTmpl: the name as a hostname, not an S3 endpoint
+}
+
+// endpointForms caches the forms for the region-less set ("") and every scanned
+// region; filled once by initEndpointForms and read-only afterwards.
+var endpointForms map[string][]endpointForm
+
+func makeEndpointForms(region string) []endpointForm {
+	tmpls := globalEndpointTmpls
+	if region != "" {
+		tmpls = regionalEndpointTmpls
+	}
+	forms := make([]endpointForm, 0, 2*len(tmpls))
+	for _, proto := range []string{"https", "http"} {
+		for _, t := range tmpls {
+			website := strings.Contains(t, "s3-website")
+			if website && proto == "https" {
+				continue // website endpoints don't serve HTTPS; the probe can only fail
+			}
+			pre, suf, _ := strings.Cut(fmt.Sprintf(t, proto, "\x00", region), "\x00")
+			forms = append(forms, endpointForm{pre: pre, suf: suf, secure: proto == "https", website: website, custom: t == rootDomainTmpl})
+		}
+	}
+	return forms
+}
+
+// formsFor returns the endpoint forms for region ("" = region-less), formatting
+// them on the fly for a region S3 reported that is not in the scanned list.
+func formsFor(region string) []endpointForm {
+	if forms, ok := endpointForms[region]; ok {
+		return forms
+	}
+	return makeEndpointForms(region)
+}
+
+func initEndpointForms() {
+	endpointForms = make(map[string][]endpointForm, len(awsRegions)+1)
+	endpointForms[""] = makeEndpointForms("")
+	for _, r := range awsRegions {
+		endpointForms[r] = makeEndpointForms(r)
+	}
+}
+
+// appendEndpoints expands the templates of one scheme for a (bucket, region)
+// pair into ready-to-run jobs appended to dst; everything webCheck needs to
+// know about an endpoint is settled here from the template rather than parsed
+// back out of the URL.
+func appendEndpoints(dst []webJob, bucket, region string, secure bool) []webJob {
+	for _, f := range formsFor(region) {
+		if f.secure == secure {
+			dst = append(dst, webJob{URL: f.pre + bucket + f.suf, Bucket: bucket, Region: region, Website: f.website, Custom: f.custom})
+		}
+	}
+	return dst
+}
+
+// endpointCount is how many jobs bucketJobs yields for a bucket probed in regions.
+func endpointCount(regions []string) int {
+	n := len(formsFor(""))
+	for _, r := range regions {
+		n += len(formsFor(r))
+	}
+	return n
+}
+
+// bucketJobs returns every endpoint of bucket as one flat slice, sized up front:
+// the region-less forms, then the regional forms for each of regions. All the
+// https endpoints come first, so by the time a worker takes an http URL its
+// https twin has usually answered and the http probe can be skipped (see
+// httpsAnswered).
+func bucketJobs(bucket string, regions []string) []webJob {
+	jobs := make([]webJob, 0, endpointCount(regions))
+	for _, secure := range []bool{true, false} {
+		jobs = appendEndpoints(jobs, bucket, "", secure)
+		for _, r := range regions {
+			jobs = appendEndpoints(jobs, bucket, r, secure)
+		}
+	}
+	return jobs
+}
+
+// maxJobChunk caps how many jobs travel through the worker queue in one send.
+const maxJobChunk = 64
+
+// jobChunkSize picks the dispatch chunk for total jobs over workers: large
+// scans hand out runs of jobs per channel operation, while small ones (a single
+// located bucket has only a couple of dozen) still go out one job at a time so
+// every worker gets a share.
+func jobChunkSize(total, workers int) int {
+	n := total / (workers * 8)
+	if n < 1 {
+		return 1
+	}
+	if n > maxJobChunk {
+		return maxJobChunk
+	}
+	return n
+}
+
+// enqueueJobs feeds batch to the workers in chunks of size, reporting false
+// once the scan is stopped.
+func enqueueJobs(jobs chan<- []webJob, batch []webJob, size int) bool {
+	for len(batch) > 0 {
+		if stopAll.Load() {
+			return false
 		}
+		n := min(size, len(batch))
+		jobs <- batch[:n:n]
+		batch = batch[n:]
 	}
-	return urls
+	return true
 }
 
 // ────────────────────────── error code extraction
 
+// extractErrorCode returns the first non-empty "(...)" in text, else a known
+// error word found in it. Every failed CLI probe goes through here, so the
+// parenthesis is located with plain byte scans rather than a regexp.
 func extractErrorCode(text string) string {
-	if m := errInParen.FindStringSubmatch(text); len(m) > 1 {
-		return m[1]
+	for rest := text; ; {
+		i := strings.IndexByte(rest, '(')
+		if i < 0 {
+			break
+		}
+		rest = rest[i+1:]
+		j := strings.IndexByte(rest, ')')
+		if j < 0 {
+			break
+		}
+		if j > 0 {
+			return rest[:j]
+		}
 	}
 	if strings.Contains(text, "Traceback (most recent call last):") {
 		return "Traceback"
@@ -296,144 +629,868 @@ func buildFlags(parts []string) string {
 
 // ────────────────────────── CLI probe
 
-func cliProbe(bucket string) {
-	if stopAll.Load() {
-		return
+// s3Endpoint returns the virtual-hosted endpoint the AWS CLI would use for
+// bucket in region ("" = global endpoint).
+func s3Endpoint(bucket, region string) string {
+	if region == "" {
+		return "https://" + bucket + ".s3.amazonaws.com"
+	}
+	return "https://" + bucket + ".s3." + region + ".amazonaws.com"
+}
+
+// headStatusCodes maps bodiless HeadBucket statuses to the S3 error code GET
+// would have returned.
+var headStatusCodes = map[int]string{
+	301: "PermanentRedirect",
+	400: "InvalidBucketName",
+	403: "AccessDenied",
+	404: "NoSuchBucket",
+}
+
+// listBucketAnon checks a bucket the way `aws s3 ls --no-sign-request` would,
+// in-process and without paging through the whole bucket: an unsigned
+// HeadBucket settles existence and list permission (it needs s3:ListBucket),
+// and only a 200 is followed by a single ListObjectsV2 page. Any HeadBucket
+// answer for an existing bucket names its region, which is recorded so the
+// bucket's other regional probes are dropped. The returned count
+// is the number of top-level objects on that page, with "+" when there are more.
+// Failures are reported as "... (Code)" so extractErrorCode reads them the same
+// way it reads AWS CLI errors.
+func listBucketAnon(bucket, region string) (string, error) {
+	base := s3Endpoint(bucket, region) + "/"
+	req, err := newRequest(scanCtx, "HEAD", base, nil)
+	if err != nil {
+		return "", err
+	}
+	resp, err := scanClient.Do(req)
+	if err != nil {
+		return "", err
+	}
+	drainClose(resp.Body)
+	if r := resp.Header.Get("x-amz-bucket-region"); r != "" {
+		learnRegion(bucket, r)
+	}
+	if resp.StatusCode != 200 {
+		code := headStatusCodes[resp.StatusCode]
+		if code == "" {
+			code = fmt.Sprintf("HTTP %d", resp.StatusCode)
+		}
+		return "", fmt.Errorf("HeadBucket failed (%s)", code)
 	}
 
-	allRegs := make([]string, 0, len(awsRegions)+1)
-	allRegs = append(allRegs, "") // no-region first
-	allRegs = append(allRegs, awsRegions...)
-	totalRegs := len(allRegs)
+	status, body := scanFetch(base+"?list-type=2&delimiter=%2F", 16<<20)
+	if status != 200 {
+		var e S3Error
+		if xml.Unmarshal([]byte(body), &e) == nil && e.Code != "" {
+			return "", fmt.Errorf("ListObjectsV2 failed (%s): %s", e.Code, e.Message)
+		}
+		if status == 0 {
+			return "", fmt.Errorf("%s", body)
+		}
+		return "", fmt.Errorf("ListObjectsV2 failed (HTTP %d)", status)
+	}
+	var result ListBucketResult
+	if err := xml.Unmarshal([]byte(body), &result); err != nil {
+		return "", fmt.Errorf("parse listing: %v", err)
+	}
+	count := strconv.Itoa(len(result.Contents))
+	if result.IsTruncated {
+		count += "+"
+	}
+	return count, nil
+}
 
-	for i, region := range allRegs {
-		if stopAll.Load() {
+// cliWorkers bounds how many (bucket, region) CLI probes run at once.
+const cliWorkers = 16
+
+// objectRequest sends one unsigned object request for the write tests and
+// returns its status code, or 0 if no response came back.
+func objectRequest(ctx context.Context, method, u, body string) int {
+	var rd io.Reader
+	if body != "" {
+		rd = strings.NewReader(body)
+	}
+	req, err := newRequest(ctx, method, u, rd)
+	if err != nil {
+		return 0
+	}
+	if rd != nil {
+		req.Header.Set("Content-Type", "text/plain")
+	}
+	resp, err := scanClient.Do(req)
+	if err != nil {
+		return 0
+	}
+	drainClose(resp.Body)
+	return resp.StatusCode
+}
+
+// writeLocks holds one mutex per bucket. Every endpoint of a bucket, in the CLI
+// and web phases alike, writes the same test object, so a bucket's write tests
+// run one at a time: another DELETE landing between a PUT and its GET would
+// report a false "GET denied".
+var writeLocks sync.Map // bucket -> *sync.Mutex
+
+// runWriteTests PUTs the test object at objURL, then GETs and (if enabled)
+// DELETEs it, all over the shared keep-alive pool; GET and DELETE only run
+// after a successful PUT. PUT and GET die with the scan on Ctrl+C; the DELETE
+// is deliberately not bound to scanCtx, so a test object that was uploaded is
+// still removed while the scan winds down.
+func runWriteTests(bucket, objURL string) (putOk, getOk, delOk bool) {
+	if !testPut {
+		return false, false, false
+	}
+	v, _ := writeLocks.LoadOrStore(bucket, new(sync.Mutex))
+	lock := v.(*sync.Mutex)
+	lock.Lock()
+	defer lock.Unlock()
+	switch objectRequest(scanCtx, "PUT", objURL, testContent) {
+	case 200, 201, 204:
+		putOk = true
+	default:
+		return false, false, false
+	}
+	getOk = objectRequest(scanCtx, "GET", objURL, "") == 200
+	if testDelete {
+		st := objectRequest(context.Background(), "DELETE", objURL, "")
+		delOk = st == 200 || st == 204
+	}
+	return putOk, getOk, delOk
+}
+
+// cliProbeRegion runs the listing and optional write tests for one bucket+region.
+func cliProbeRegion(bucket, region string) {
+	// Buckets discovery could not place are queued for every region; once one
+	// HeadBucket has named the home region, the others can only redirect.
+	if region != "" && !flagExhaust {
+		if r := knownRegion(bucket); r != "" && r != region {
 			return
 		}
-		progressCounter(i+1, totalRegs)
+	}
 
-		// Skip already-found bucket+region
-		mu.Lock()
-		if regs, ok := foundBuckets[bucket]; ok {
-			if region == "" || regs[region] {
-				mu.Unlock()
-				continue
-			}
-		}
-		mu.Unlock()
+	label := "No Region"
+	if region != "" {
+		label = region
+	}
 
-		label := "No Region"
-		if region != "" {
-			label = region
+	// ── anonymous list (what `aws s3 ls --no-sign-request` sends) ──
+	bucketAccessible := false
+	objectCount := ""
+	errCode := "" // extracted once; gates the writes and labels the miss
+
+	if n, err := listBucketAnon(bucket, region); err == nil {
+		bucketAccessible = true
+		objectCount = n
+	} else {
+		errCode = extractErrorCode(err.Error())
+	}
+
+	// ── PUT / GET / DELETE tests (skip if bucket doesn't exist here) ──
+	// Unsigned object requests against the same endpoint, in-process (what
+	// `aws s3 cp/rm --no-sign-request` would send). The HeadBucket answer gates
+	// them: no bucket, a bad name, or a redirect to the bucket's real region
+	// (tested by the no-region and home-region probes) all skip the writes.
+	putOk, getOk, delOk := false, false, false
+	skipWrites := false
+	switch errCode {
+	case "NoSuchBucket", "InvalidBucketName", "PermanentRedirect":
+		skipWrites = true
+	}
+
+	if !skipWrites && testPut {
+		putOk, getOk, delOk = runWriteTests(bucket, s3Endpoint(bucket, region)+"/"+testFilename)
+	}
+
+	// ── report ──
+	if bucketAccessible || putOk || getOk || delOk {
+		var fp []string
+		if putOk {
+			fp = append(fp, "PUT")
+		}
+		if getOk {
+			fp = append(fp, "GET")
+		}
+		if delOk {
+			fp = append(fp, "DELETE")
 		}
+		flags := buildFlags(fp)
+		line := fmt.Sprintf(
+			"\033[1;33m[AWS CLI]\033[0m Access Denied (but operations work): \033[1;32ms3://%s\033[0m %s%s",
+			bucket, label, flags)
+		if bucketAccessible {
+			line = fmt.Sprintf(
+				"\033[1;33m[AWS CLI]\033[0m Found: \033[1;32ms3://%s\033[0m %s \033[0;36m(objects: %s)\033[0m%s",
+				bucket, label, objectCount, flags)
+		}
+		findings <- finding{
+			access: BucketAccess{
+				Bucket: bucket, Region: region, Mode: "cli",
+				CanList: bucketAccessible, CanPut: putOk, CanGet: getOk, CanDel: delOk,
+			},
+			region: label,
+			line:   line,
+		}
+	} else {
+		code := "No operations succeeded"
+		if errCode != "" {
+			code = errCode
+		}
+		findings <- finding{line: fmt.Sprintf(
+			"\033[1;31m[AWS CLI]\033[0m Not accessible: \033[1;32ms3://%s\033[0m %s (%s)",
+			bucket, label, code)}
+	}
+}
 
-		// ── aws s3 ls ──
-		args := []string{"s3", "ls", "s3://" + bucket, "--no-sign-request", "--summarize"}
-		if region != "" {
-			args = append(args, "--region", region)
+// cliJob is one (bucket, region) CLI probe.
+type cliJob struct {
+	bucket, region string
+}
+
+func runCLIChecks() {
+	modeText := fmt.Sprintf("%d base bucket(s)", len(baseBuckets))
+	if flagNameVar {
+		modeText = fmt.Sprintf("%d bucket variation(s)", len(allVariations))
+	}
+	fmt.Printf("Checking CLI access for %s across %d regions...\n", modeText, len(awsRegions))
+
+	// One pool over every (bucket, region) pair rather than one bucket at a
+	// time: once discovery has placed a bucket it has only two probes (no
+	// region + home region), so a per-bucket pool would sit mostly idle.
+	total := 0
+	for _, rs := range planRegions {
+		total += 1 + len(rs)
+	}
+
+	var (
+		done atomic.Int64
+		wg   sync.WaitGroup
+	)
+	stopProgress := startProgress("CLI", &done, total)
+	defer stopProgress()
+	jobs := make(chan cliJob, cliWorkers)
+	for i := 0; i < cliWorkers; i++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			for j := range jobs {
+				if !stopAll.Load() {
+					cliProbeRegion(j.bucket, j.region)
+				}
+				done.Add(1)
+			}
+		}()
+	}
+
+produce:
+	for i, b := range allVariations {
+		for _, r := range append([]string{""}, planRegions[i]...) {
+			if stopAll.Load() {
+				break produce
+			}
+			jobs <- cliJob{bucket: b, region: r}
 		}
+	}
+	close(jobs)
+	wg.Wait()
+}
 
-		bucketAccessible := false
-		objectCount := ""
-		errorOutput := ""
+// ────────────────────────── HTTP client
 
-		out, err := exec.Command("aws", args...).CombinedOutput()
-		outStr := string(out)
-		if err == nil {
-			if m := totalRe.FindStringSubmatch(outStr); len(m) > 1 {
-				bucketAccessible = true
-				objectCount = m[1]
+// userAgent is attached to every outgoing request, by newRequest or else by
+// uaTransport; some custom domains in front of buckets reject the default
+// Go-http-client agent.
+const userAgent = "Mozilla/5.0 (compatible; 0xS3)"
+
+// newRequest builds a request bound to ctx with the User-Agent already set.
+// Every scan request is built here, so uaTransport never has to copy one.
+func newRequest(ctx context.Context, method, u string, body io.Reader) (*http.Request, error) {
+	req, err := http.NewRequestWithContext(ctx, method, u, body)
+	if err == nil {
+		req.Header.Set("User-Agent", userAgent)
+	}
+	return req, err
+}
+
+// uaTransport adds the User-Agent to requests built elsewhere (the shell's
+// plain http.NewRequest and httpClient.Get calls). Only those are cloned, since
+// a RoundTripper must not modify the caller's request.
+type uaTransport struct {
+	base *http.Transport
+}
+
+func (t *uaTransport) RoundTrip(r *http.Request) (*http.Response, error) {
+	if _, ok := r.Header["User-Agent"]; !ok {
+		r = r.Clone(r.Context())
+		r.Header.Set("User-Agent", userAgent)
+	}
+	return t.base.RoundTrip(r)
+}
+
+func (t *uaTransport) CloseIdleConnections() { t.base.CloseIdleConnections() }
+
+// maxConnsPerHost caps simultaneous connections to any one hostname. Path-style
+// probes for every bucket converge on the same few regional S3 hosts, and a
+// burst of the whole worker pool against one of them draws 503 SlowDown; extra
+// requests for a busy host queue for a free connection instead.
+const maxConnsPerHost = 16
+
+// Probe timeouts. An endpoint that cannot be reached from this network (a
+// partition the host has no route to, a dead custom domain) would otherwise
+// hold its worker for the kernel's connect timeout or the client's overall
+// limit; S3 itself connects in milliseconds and answers headers well inside a
+// second, so a silent peer is failed fast and the probe counts as not found.
+// The overall client timeout still bounds body reads such as large listings.
+const (
+	dialTimeout   = 3 * time.Second
+	headerTimeout = 5 * time.Second
+)
+
+// newHTTPClient builds the single shared client. Nearly every probe URL lands on
+// a handful of S3 hostnames, so the idle pool is sized to the worker count: each
+// worker can park its keep-alive connection per host instead of paying a fresh
+// TCP+TLS handshake on the next URL.
+func newHTTPClient(threads int) *http.Client {
+	if threads < 1 {
+		threads = 1
+	}
+	dialer := &net.Dialer{
+		Timeout:   dialTimeout,
+		KeepAlive: 30 * time.Second,
+	}
+	dial := func(ctx context.Context, network, addr string) (net.Conn, error) {
+		return dialCached(ctx, dialer, network, addr)
+	}
+	return &http.Client{
+		Timeout: 15 * time.Second,
+		Transport: &uaTransport{base: &http.Transport{
+			DialContext:           dial,
+			TLSHandshakeTimeout:   dialTimeout,
+			ResponseHeaderTimeout: headerTimeout,
+			MaxIdleConns:          threads * 4,
+			MaxIdleConnsPerHost:   min(threads, maxConnsPerHost),
+			MaxConnsPerHost:       maxConnsPerHost,
+			IdleConnTimeout:       90 * time.Second,
+			// One TLS config for the whole run, with a session cache: connections
+			// beyond the first to a host resume the TLS session instead of redoing
+			// the full handshake. Verification is off, matching Python behaviour.
+			TLSClientConfig: &tls.Config{
+				InsecureSkipVerify: true,
+				ClientSessionCache: tls.NewLRUClientSessionCache(1024),
+			},
+			// A custom dialer/TLS config turns Go's automatic HTTP/2 off. Offer it
+			// again via ALPN: hosts that speak it (CloudFront-fronted bucket
+			// domains) multiplex all probes over one connection, and plain S3
+			// endpoints simply negotiate HTTP/1.1 as before.
+			ForceAttemptHTTP2: true,
+		}},
+	}
+}
+
+// newScanClient wraps base's transport (and so its connection pool) in a client
+// that hands 3xx responses back instead of following them. For a probe the
+// redirect is the answer: a 301/307 from S3 already proves the bucket exists and
+// names its region in x-amz-bucket-region, and chasing Location would only cost
+// another round trip and hide that header behind the final response.
+//
+// Scan requests are also paced per host (see hostPacer); the shell's requests
+// are interactive and go through base unpaced.
+func newScanClient(base *http.Client) *http.Client {
+	return &http.Client{
+		Timeout:   base.Timeout,
+		Transport: &pacedTransport{base: base.Transport, pacer: newHostPacer(hostRateLimit, hostRateBurst)},
+		CheckRedirect: func(*http.Request, []*http.Request) error {
+			return http.ErrUseLastResponse
+		},
+	}
+}
+
+// S3 answers 503 SlowDown once one prefix sees more than a few hundred GETs a
+// second, and a throttled probe is a wasted request that still looks like
+// "not found". Scan traffic is held to hostRateLimit requests per second per
+// hostname, with room for a short burst of hostRateBurst. The budget is per
+// host, not per bucket: every path-style bucket on s3.<region>.amazonaws.com
+// shares the one budget of that host.
+const (
+	hostRateLimit = 200
+	hostRateBurst = 20
+)
+
+// pacerShards splits hostPacer's state so concurrent requests to different
+// hosts rarely contend on the same mutex; the pacer sits on every scan request.
+const pacerShards = 32
+
+// hostPacer is a per-host token bucket kept as one "next free slot" time per
+// host (GCRA): a request takes the slot and pushes it one interval further, and
+// slots are allowed to lag up to burst intervals behind now.
+//
+// Virtual-hosted probes use a new hostname per bucket and region, so each
+// shard drops slots that lag further than that every pacerSweep: such a slot
+// behaves exactly like a missing one.
+type hostPacer struct {
+	shards   [pacerShards]pacerShard
+	interval time.Duration
+	burst    time.Duration
+}
+
+type pacerShard struct {
+	mu    sync.Mutex
+	next  map[string]time.Time
+	swept time.Time
+}
+
+const pacerSweep = 10 * time.Second
+
+func newHostPacer(perSec, burst int) *hostPacer {
+	interval := time.Second / time.Duration(perSec)
+	p := &hostPacer{
+		interval: interval,
+		burst:    interval * time.Duration(burst),
+	}
+	for i := range p.shards {
+		p.shards[i].next = make(map[string]time.Time)
+	}
+	return p
+}
+
+// shard picks host's shard by FNV-1a hash.
+func (p *hostPacer) shard(host string) *pacerShard {
+	h := uint32(2166136261)
+	for i := 0; i < len(host); i++ {
+		h ^= uint32(host[i])
+		h *= 16777619
+	}
+	return &p.shards[h%pacerShards]
+}
+
+// wait blocks until host has a free slot or ctx is done.
+func (p *hostPacer) wait(ctx context.Context, host string) error {
+	sh := p.shard(host)
+	sh.mu.Lock()
+	now := time.Now()
+	floor := now.Add(-p.burst)
+	if now.Sub(sh.swept) > pacerSweep {
+		for h, t := range sh.next {
+			if t.Before(floor) {
+				delete(sh.next, h)
 			}
+		}
+		sh.swept = now
+	}
+	slot := sh.next[host]
+	if slot.Before(floor) {
+		slot = floor
+	}
+	sh.next[host] = slot.Add(p.interval)
+	sh.mu.Unlock()
+
+	d := slot.Sub(now)
+	if d <= 0 {
+		return nil
+	}
+	t := time.NewTimer(d)
+	defer t.Stop()
+	select {
+	case <-t.C:
+		return nil
+	case <-ctx.Done():
+		return ctx.Err()
+	}
+}
+
+// pacedTransport waits for a per-host slot before every round trip.
+type pacedTransport struct {
+	base  http.RoundTripper
+	pacer *hostPacer
+}
+
+func (t *pacedTransport) RoundTrip(r *http.Request) (*http.Response, error) {
+	if err := t.pacer.wait(r.Context(), r.URL.Host); err != nil {
+		return nil, err
+	}
+	return t.base.RoundTrip(r)
+}
+
+// ────────────────────────── DNS pre-resolution
+
+// dnsCache maps hostnames to their resolved addresses for up to dnsTTL.
+// Go's own resolver keeps no cache, so without it every new connection to the
+// same host would repeat the lookup.
+var dnsCache sync.Map // host -> *hostAddrs
+
+// dnsTTL is how long cached addresses are trusted. S3 retires front-end IPs,
+// and a long -l scan must not keep dialling ones that have gone away.
+const dnsTTL = 10 * time.Minute
+
+// hostAddrs is one host's resolved addresses, split by family, plus a rotating
+// start index. S3 answers with several front-end IPs per name; dialling them in
+// turn spreads the pool's connections across them instead of piling every one
+// onto the first address (and its share of the request-rate limit).
+type hostAddrs struct {
+	v4, v6 []string
+	at     time.Time // when they were resolved
+	next   atomic.Uint32
+}
+
+// cacheAddrs stores addrs as host's current addresses, replacing any older
+// entry.
+func cacheAddrs(host string, addrs []string) *hostAddrs {
+	ha := &hostAddrs{at: time.Now()}
+	for _, a := range addrs {
+		if ip := net.ParseIP(a); ip != nil && ip.To4() == nil {
+			ha.v6 = append(ha.v6, a)
 		} else {
-			errorOutput = outStr
-		}
-
-		// ── PUT / GET / DELETE tests (skip if bucket doesn't exist) ──
-		putOk, getOk, delOk := false, false, false
-		isNoSuchBucket := strings.Contains(errorOutput, "NoSuchBucket")
-
-		if !isNoSuchBucket {
-			ensureTestFile()
-			s3Obj := "s3://" + bucket + "/" + testFilename
-			putArgs := []string{"s3", "cp", testFilePath, s3Obj, "--no-sign-request"}
-			getArgs := []string{"s3", "cp", s3Obj, filepath.Join(tmpDir, "downloaded_"+testFilename), "--no-sign-request"}
-			rmArgs := []string{"s3", "rm", s3Obj, "--no-sign-request"}
-			if region != "" {
-				putArgs = append(putArgs, "--region", region)
-				getArgs = append(getArgs, "--region", region)
-				rmArgs = append(rmArgs, "--region", region)
-			}
+			ha.v4 = append(ha.v4, a)
+		}
+	}
+	dnsCache.Store(host, ha)
+	return ha
+}
 
-			if testPut {
-				if _, e := exec.Command("aws", putArgs...).CombinedOutput(); e == nil {
-					putOk = true
-				}
+// dialOrder returns the addresses one dial tries: the host's IPv4 addresses,
+// rotated, then its IPv6 ones, so a broken IPv6 route is only tried last.
+func (ha *hostAddrs) dialOrder(network string) []string {
+	primary, other := ha.v4, ha.v6
+	switch network {
+	case "tcp4":
+		other = nil
+	case "tcp6":
+		primary, other = ha.v6, nil
+	}
+	k := ha.next.Add(1) - 1
+	return append(rotated(primary, k), rotated(other, k)...)
+}
+
+// rotated returns a copy of s starting k places along.
+func rotated(s []string, k uint32) []string {
+	if len(s) == 0 {
+		return nil
+	}
+	i := int(k % uint32(len(s)))
+	return append(append(make([]string, 0, len(s)), s[i:]...), s[:i]...)
+}
+
+// sharedS3Hosts lists the path-style hostnames every bucket is probed through
+// for the given regions (virtual-hosted names are unique per bucket and gain
+// nothing from warming).
+func sharedS3Hosts(regions []string) []string {
+	hosts := []string{"s3.amazonaws.com"}
+	for _, r := range regions {
+		hosts = append(hosts,
+			"s3."+r+".amazonaws.com",
+			"s3-"+r+".amazonaws.com",
+			"s3-website."+r+".amazonaws.com",
+			"s3-website-"+r+".amazonaws.com",
+			"s3.dualstack."+r+".amazonaws.com",
+		)
+	}
+	return hosts
+}
+
+// prewarmDNS resolves hosts in parallel and stores the results in dnsCache, so
+// the lookups are off the critical path before the request storm starts.
+func prewarmDNS(hosts []string) {
+	var wg sync.WaitGroup
+	for _, h := range hosts {
+		wg.Add(1)
+		go func(host string) {
+			defer wg.Done()
+			ctx, cancel := context.WithTimeout(scanCtx, 5*time.Second)
+			defer cancel()
+			if addrs, err := net.DefaultResolver.LookupHost(ctx, host); err == nil && len(addrs) > 0 {
+				cacheAddrs(host, addrs)
 			}
-			if putOk {
-				if _, e := exec.Command("aws", getArgs...).CombinedOutput(); e == nil {
-					getOk = true
+		}(h)
+	}
+	wg.Wait()
+}
+
+// dialCached dials host's cached addresses in rotation (see dialOrder),
+// resolving them on first use for hosts prewarmDNS did not cover (per-bucket
+// virtual-hosted names are dialled for both schemes and again after idle
+// connections expire) and again once they are older than dnsTTL. An entry whose
+// addresses all fail to dial is dropped. IP literals dial straight through. TLS still sends SNI for the original
+// hostname, which the transport takes from the request URL.
+func dialCached(ctx context.Context, d *net.Dialer, network, addr string) (net.Conn, error) {
+	host, port, err := net.SplitHostPort(addr)
+	if err != nil || net.ParseIP(host) != nil {
+		return d.DialContext(ctx, network, addr)
+	}
+	var ha *hostAddrs
+	if v, ok := dnsCache.Load(host); ok && time.Since(v.(*hostAddrs).at) < dnsTTL {
+		ha = v.(*hostAddrs)
+	} else {
+		addrs, err := net.DefaultResolver.LookupHost(ctx, host)
+		if err != nil {
+			return nil, err
+		}
+		if len(addrs) == 0 {
+			return d.DialContext(ctx, network, addr)
+		}
+		ha = cacheAddrs(host, addrs)
+	}
+	order := ha.dialOrder(network)
+	if len(order) == 0 {
+		return d.DialContext(ctx, network, addr)
+	}
+	var lastErr error
+	for _, ip := range order {
+		conn, err := d.DialContext(ctx, network, net.JoinHostPort(ip, port))
+		if err == nil {
+			return conn, nil
+		}
+		lastErr = err
+	}
+	if ctx.Err() == nil {
+		dnsCache.CompareAndDelete(host, ha)
+	}
+	return nil, lastErr
+}
+
+// drainClose discards what is left of a (small) response body before closing it,
+// so the underlying connection goes back to the idle pool instead of being torn down.
+func drainClose(body io.ReadCloser) {
+	_, _ = io.Copy(io.Discard, io.LimitReader(body, 64<<10))
+	body.Close()
+}
+
+// preconnectWorkers bounds the warm-up requests issued by prewarmConns.
+const preconnectWorkers = 8
+
+// prewarmConns opens one keep-alive connection to each shared host before the
+// fan-out, so the TCP and TLS handshakes are paid here rather than by the first
+// wave of workers. Website endpoints only speak plain HTTP; everything else is
+// warmed over HTTPS. Responses are discarded.
+func prewarmConns(hosts []string) {
+	ch := make(chan string)
+	var wg sync.WaitGroup
+	for i := 0; i < preconnectWorkers; i++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			for h := range ch {
+				scheme := "https://"
+				if strings.HasPrefix(h, "s3-website") {
+					scheme = "http://"
 				}
-			}
-			if testDelete && putOk {
-				if _, e := exec.Command("aws", rmArgs...).CombinedOutput(); e == nil {
-					delOk = true
+				ctx, cancel := context.WithTimeout(scanCtx, 5*time.Second)
+				req, err := newRequest(ctx, "HEAD", scheme+h+"/", nil)
+				if err == nil {
+					if resp, err := scanClient.Do(req); err == nil {
+						drainClose(resp.Body)
+					}
 				}
+				cancel()
 			}
+		}()
+	}
+	for _, h := range hosts {
+		if stopAll.Load() {
+			break
 		}
+		ch <- h
+	}
+	close(ch)
+	wg.Wait()
+}
 
-		// ── report ──
-		if bucketAccessible || putOk || getOk || delOk {
-			var fp []string
-			if putOk {
-				fp = append(fp, "PUT")
-			}
-			if getOk {
-				fp = append(fp, "GET")
-			}
-			if delOk {
-				fp = append(fp, "DELETE")
-			}
-			flags := buildFlags(fp)
-			markFound(bucket, label)
-			recordAccess(BucketAccess{
-				Bucket: bucket, Region: region, Mode: "cli",
-				CanList: bucketAccessible, CanPut: putOk, CanGet: getOk, CanDel: delOk,
-			})
+// ────────────────────────── region discovery
 
-			if bucketAccessible {
-				logMsg(fmt.Sprintf(
-					"\033[1;33m[AWS CLI]\033[0m Found: \033[1;32ms3://%s\033[0m %s \033[0;36m(objects: %s)\033[0m%s",
-					bucket, label, objectCount, flags), true)
-			} else {
-				logMsg(fmt.Sprintf(
-					"\033[1;33m[AWS CLI]\033[0m Access Denied (but operations work): \033[1;32ms3://%s\033[0m %s%s",
-					bucket, label, flags), true)
+// discoverRegion asks the global endpoint which region a bucket lives in. S3
+// reports it in x-amz-bucket-region on any answer for an existing bucket
+// (200, 403 or a redirect), so one HEAD replaces probing all regions blindly.
+// A 404 from S3 itself means the name is free in the whole aws partition,
+// reported as dead.
+func discoverRegion(bucket string) (region string, dead bool) {
+	req, err := newRequest(scanCtx, "HEAD", "https://"+bucket+".s3.amazonaws.com/", nil)
+	if err != nil {
+		return "", false
+	}
+	resp, err := scanClient.Do(req)
+	if err != nil {
+		return "", false
+	}
+	drainClose(resp.Body)
+	dead = resp.StatusCode == 404 && resp.Header.Get("x-amz-request-id") != ""
+	return resp.Header.Get("x-amz-bucket-region"), dead
+}
+
+// discoverRegions fills bucketRegion for every bucket S3 will locate for us.
+// It reports through the same status line as the scan phases, since a large
+// -l list can keep it busy for minutes.
+func discoverRegions(buckets []string) {
+	var done atomic.Int64
+	stopProgress := startProgress("Regions", &done, len(buckets))
+	jobs := make(chan string, flagThreads*2)
+	var wg sync.WaitGroup
+	for i := 0; i < flagThreads; i++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			for b := range jobs {
+				if stopAll.Load() {
+					continue
+				}
+				r, dead := discoverRegion(b)
+				if r != "" {
+					bucketRegion.Store(b, r)
+					logMsg(fmt.Sprintf("[Region] %s is in %s", b, r), false)
+				} else if dead {
+					deadBuckets.Store(b, true)
+					logMsg(fmt.Sprintf("[Region] %s does not exist", b), false)
+				}
+				done.Add(1)
 			}
-		} else {
-			code := "No operations succeeded"
-			if errorOutput != "" {
-				code = extractErrorCode(errorOutput)
+		}()
+	}
+	for _, b := range buckets {
+		jobs <- b
+	}
+	close(jobs)
+	wg.Wait()
+	stopProgress()
+	fmt.Fprintf(os.Stdout, "\r%-80s\r", "")
+}
+
+// knownRegion returns the region S3 has reported for bucket, or "".
+func knownRegion(bucket string) string {
+	if v, ok := bucketRegion.Load(bucket); ok {
+		return v.(string)
+	}
+	return ""
+}
+
+// learnRegion records a region S3 reported mid-scan, for buckets the upfront
+// discovery pass could not place (timeouts, endpoints that answered late).
+func learnRegion(bucket, region string) {
+	bucketRegion.LoadOrStore(bucket, region)
+}
+
+// planScan fixes planRegions from what discovery learned.
+func planScan() {
+	planRegions = make([][]string, len(allVariations))
+	for i, b := range allVariations {
+		planRegions[i] = regionsFor(b)
+	}
+}
+
+// plannedRegions returns each region some bucket is planned to be probed in, once.
+func plannedRegions() []string {
+	var out []string
+	seen := make(map[string]bool)
+	for _, rs := range planRegions {
+		for _, r := range rs {
+			if !seen[r] {
+				seen[r] = true
+				out = append(out, r)
 			}
-			logMsg(fmt.Sprintf(
-				"\033[1;31m[AWS CLI]\033[0m Not accessible: \033[1;32ms3://%s\033[0m %s (%s)",
-				bucket, label, code), true)
 		}
 	}
+	return out
 }
 
-func runCLIChecks() {
-	modeText := fmt.Sprintf("%d base bucket(s)", len(baseBuckets))
-	if flagNameVar {
-		modeText = fmt.Sprintf("%d bucket variation(s)", len(allVariations))
+// deadBuckets holds names S3's global endpoint answered NoSuchBucket for.
+var deadBuckets sync.Map // bucket -> true
+
+// httpsAnswered holds, per bucket, the https endpoints (URL minus scheme) S3
+// itself gave a verdict for. Plain http reaches the same bucket on the same
+// host and gets the same answer, so its probe is dropped. The http twin
+// consumes its entry, but a twin may already have run or never come (a skipped
+// or stopped bucket), so a bucket's whole set is dropped once its last job has
+// run: the map only ever holds the buckets in the queue.
+var httpsAnswered sync.Map // bucket -> *bucketTwins
+
+type bucketTwins struct {
+	pending  atomic.Int64 // the bucket's jobs not yet run
+	answered sync.Map     // host/path -> struct{}
+}
+
+// trackTwins registers the n queued jobs of bucket.
+func trackTwins(bucket string, n int) {
+	if n == 0 {
+		return
 	}
-	fmt.Printf("Checking CLI access for %s across %d regions...\n", modeText, len(awsRegions))
+	tw := new(bucketTwins)
+	tw.pending.Store(int64(n))
+	httpsAnswered.Store(bucket, tw)
+}
 
-	for _, bkt := range allVariations {
-		if stopAll.Load() {
-			break
+// jobDone counts one of bucket's jobs as run, dropping its set after the last.
+func jobDone(bucket string) {
+	if v, ok := httpsAnswered.Load(bucket); ok && v.(*bucketTwins).pending.Add(-1) == 0 {
+		httpsAnswered.Delete(bucket)
+	}
+}
+
+// answeredOverHTTPS records that S3 gave a verdict for the https job.
+func answeredOverHTTPS(job webJob) {
+	rest, ok := strings.CutPrefix(job.URL, "https://")
+	if !ok {
+		return
+	}
+	if v, ok := httpsAnswered.Load(job.Bucket); ok {
+		v.(*bucketTwins).answered.Store(rest, struct{}{})
+	}
+}
+
+// settledOverHTTPS reports whether the http job can be skipped because its
+// https twin already got a verdict.
+func settledOverHTTPS(job webJob) bool {
+	rest, ok := strings.CutPrefix(job.URL, "http://")
+	if !ok {
+		return false
+	}
+	v, ok := httpsAnswered.Load(job.Bucket)
+	if !ok {
+		return false
+	}
+	_, done := v.(*bucketTwins).answered.LoadAndDelete(rest)
+	return done
+}
+
+// inAWSPartition reports whether region ("" = global endpoint) shares the
+// commercial partition's bucket namespace. China, GovCloud and ISO regions are
+// separate namespaces, so a NoSuchBucket from the global endpoint says nothing
+// about them.
+func inAWSPartition(region string) bool {
+	for _, p := range []string{"cn-", "us-gov-", "us-iso"} {
+		if strings.HasPrefix(region, p) {
+			return false
 		}
-		cliProbe(bkt)
 	}
+	return true
+}
+
+// bucketDead reports whether bucket is known not to exist in region's
+// partition, in which case its probes there are skipped unless -e is set.
+func bucketDead(bucket, region string) bool {
+	if flagExhaust || !inAWSPartition(region) {
+		return false
+	}
+	_, ok := deadBuckets.Load(bucket)
+	return ok
+}
+
+// regionsFor returns the regions worth probing for bucket: only the one S3
+// reported, if any; for a name that does not exist, only regions outside the
+// aws partition (there are none without -a); otherwise every known region.
+// -e/--exhaustive probes every region regardless, matching webCheck.
+func regionsFor(bucket string) []string {
+	if flagExhaust {
+		return awsRegions
+	}
+	if r := knownRegion(bucket); r != "" {
+		return []string{r}
+	}
+	if bucketDead(bucket, "") {
+		var other []string
+		for _, r := range awsRegions {
+			if !inAWSPartition(r) {
+				other = append(other, r)
+			}
+		}
+		return other
+	}
+	return awsRegions
 }
 
 // ────────────────────────── web probe
@@ -442,40 +1499,223 @@ func httpFetch(url string) (int, string) {
 	return httpFetchLimit(url, 1<<20)
 }
 
+// bodyBufPool recycles read buffers across requests; io.ReadAll would regrow a
+// fresh slice (several allocations) for every response body.
+var bodyBufPool = sync.Pool{New: func() any { return new(bytes.Buffer) }}
+
 func httpFetchLimit(u string, max int64) (int, string) {
-	resp, err := httpClient.Get(u)
+	return fetchWith(context.Background(), httpClient, u, max)
+}
+
+// scanFetch is httpFetchLimit for the scan phase: bound to scanCtx and
+// reporting redirects rather than following them.
+func scanFetch(u string, max int64) (int, string) {
+	return fetchWith(scanCtx, scanClient, u, max)
+}
+
+func fetchWith(ctx context.Context, c *http.Client, u string, max int64) (int, string) {
+	req, err := newRequest(ctx, "GET", u, nil)
 	if err != nil {
 		return 0, err.Error()
 	}
-	defer resp.Body.Close()
-	body, _ := io.ReadAll(io.LimitReader(resp.Body, max))
-	return resp.StatusCode, string(body)
+	resp, err := c.Do(req)
+	if err != nil {
+		return 0, err.Error()
+	}
+	defer drainClose(resp.Body)
+	buf := bodyBufPool.Get().(*bytes.Buffer)
+	buf.Reset()
+	_, _ = buf.ReadFrom(io.LimitReader(resp.Body, max))
+	body := buf.String()
+	if buf.Cap() <= 64<<10 { // don't pin the odd multi-MB listing buffer
+		bodyBufPool.Put(buf)
+	}
+	return resp.StatusCode, body
 }
 
-func webCheck(url string) {
-	mu.Lock()
-	if checkedSet[url] || stopAll.Load() {
-		mu.Unlock()
+// probeResult is what webCheck needs from one endpoint probe.
+type probeResult struct {
+	status  int
+	hasBody bool // a GET body was read; false when HEAD alone decided
+	sig     probeSignals
+	hdr     http.Header // from the HEAD; nil on transport errors
+}
+
+// probeEndpoint classifies a bucket endpoint with a HEAD request, which S3 answers
+// with the same status codes as GET but no body: 403 = exists/denied, 404 =
+// NoSuchBucket, 400 = invalid name. Only a 200 (possible listing), an endpoint
+// that rejects HEAD, or a 403/404 that did not come from S3 is re-fetched with
+// GET so the body can be inspected.
+func probeEndpoint(u string) probeResult {
+	req, err := newRequest(scanCtx, "HEAD", u, nil)
+	if err != nil {
+		return probeResult{}
+	}
+	resp, err := scanClient.Do(req)
+	if err != nil {
+		return probeResult{}
+	}
+	drainClose(resp.Body)
+	switch resp.StatusCode {
+	case 200, 405, 501:
+		return probeGet(u, resp.Header)
+	case 403, 404:
+		// Without S3's request id the bare status proves nothing (CDNs and
+		// proxies in front of custom-domain buckets answer 403/404 themselves);
+		// only the body can tell an S3 error page apart.
+		if resp.Header.Get("x-amz-request-id") == "" {
+			return probeGet(u, resp.Header)
+		}
+	}
+	return probeResult{status: resp.StatusCode, hdr: resp.Header}
+}
+
+// probeGet fetches the first markerWindow bytes of u into a pooled buffer and
+// scans them there: the body is never copied out into a string, since only
+// the markers in it matter (a public listing can run to megabytes).
+func probeGet(u string, hdr http.Header) probeResult {
+	req, err := newRequest(scanCtx, "GET", u, nil)
+	if err != nil {
+		return probeResult{hdr: hdr}
+	}
+	resp, err := scanClient.Do(req)
+	if err != nil {
+		return probeResult{hdr: hdr}
+	}
+	defer drainClose(resp.Body)
+	buf := bodyBufPool.Get().(*bytes.Buffer)
+	buf.Reset()
+	_, _ = buf.ReadFrom(io.LimitReader(resp.Body, markerWindow))
+	res := probeResult{
+		status:  resp.StatusCode,
+		hasBody: buf.Len() > 0,
+		sig:     scanProbeBody(resp.StatusCode, buf.Bytes()),
+		hdr:     hdr,
+	}
+	bodyBufPool.Put(buf)
+	return res
+}
+
+// probeSignals records which S3 markers a probe body contains.
+type probeSignals struct {
+	listing      bool // <ListBucketResult xmlns=
+	denied       bool // AccessDenied
+	noSuchBucket bool // NoSuchBucket
+	missing      bool // NoSuchBucket or InvalidBucketName
+}
+
+// markerWindow is how much of a probe body is read and scanned.
+const markerWindow = 4096
+
+var (
+	markNoSuchBucket = []byte("NoSuchBucket")
+	markInvalidName  = []byte("InvalidBucketName")
+	markListing      = []byte("<ListBucketResult xmlns=")
+	markDenied       = []byte("AccessDenied")
+)
+
+// scanProbeBody checks each marker exactly once per body; webCheck used to
+// re-scan the same body for NoSuchBucket/InvalidBucketName in every branch.
+// bytes.Contains is a vectorised substring search, cheaper here than a
+// combined regexp alternation, and works on the raw bytes with no decoding.
+// Only 200/403/404 bodies can change a verdict, and every S3 marker sits
+// inside XML/HTML, so anything else is rejected before searching for markers.
+func scanProbeBody(status int, body []byte) probeSignals {
+	if status != 200 && status != 403 && status != 404 {
+		return probeSignals{}
+	}
+	// S3 puts the root element and error code in the first few hundred bytes;
+	// scanning further only walks object keys of a big listing (where a key
+	// named "NoSuchBucket" would otherwise flip the verdict).
+	if len(body) > markerWindow {
+		body = body[:markerWindow]
+	}
+	if bytes.IndexByte(body, '<') < 0 {
+		return probeSignals{}
+	}
+	var sig probeSignals
+	sig.noSuchBucket = bytes.Contains(body, markNoSuchBucket)
+	sig.missing = sig.noSuchBucket || bytes.Contains(body, markInvalidName)
+	if !sig.missing {
+		sig.listing = bytes.Contains(body, markListing)
+		sig.denied = !sig.listing && bytes.Contains(body, markDenied)
+	}
+	return sig
+}
+
+// webJob is one endpoint to probe, tagged at generation time with the bucket
+// and region it was built for so workers never have to parse them back out.
+type webJob struct {
+	URL     string
+	Bucket  string
+	Region  string // "" for region-less endpoints
+	Website bool   // static-website endpoint: read-only, no write tests
+	Custom  bool   // -d root-domain probe: reaches whatever serves the name, not S3
+}
+
+// bucketResolved reports whether bucket's remaining endpoints can be skipped
+// (unless -e/--exhaustive is set): it already has a listable endpoint, or S3
+// refused to list it and there are no write tests left to try. List permission
+// is per bucket, so another endpoint could only repeat the AccessDenied, while
+// a PUT may still succeed elsewhere.
+func bucketResolved(bucket string) bool {
+	if flagExhaust {
+		return false
+	}
+	if _, ok := resolved.Load(bucket); ok {
+		return true
+	}
+	if testPut {
+		return false
+	}
+	_, ok := denied.Load(bucket)
+	return ok
+}
+
+func webCheck(job webJob) {
+	url := job.URL
+	if !job.Website && settledOverHTTPS(job) {
 		return
 	}
-	checkedSet[url] = true
-	mu.Unlock()
+	if stopAll.Load() || bucketResolved(job.Bucket) {
+		return
+	}
+	// S3's NoSuchBucket only rules out its own endpoints. A root-domain probe
+	// can reach a CloudFront or custom-domain front for a bucket of another
+	// name, so it always runs.
+	if !job.Custom && bucketDead(job.Bucket, job.Region) {
+		return
+	}
+	// Jobs for buckets discovery could not place are queued for every region;
+	// once any answer names the home region, the rest are dead weight.
+	if job.Region != "" && !flagExhaust {
+		if r := knownRegion(job.Bucket); r != "" && r != job.Region {
+			return
+		}
+	}
 
-	status, body := httpFetch(url)
+	res := probeEndpoint(url)
+	status, sig, hdr := res.status, res.sig, res.hdr
+	if r := hdr.Get("x-amz-bucket-region"); r != "" {
+		learnRegion(job.Bucket, r)
+	}
+	// A bodiless verdict is only trusted when S3 itself answered (every S3
+	// response carries a request id), not some unrelated host on the same name.
+	fromS3 := hdr.Get("x-amz-request-id") != ""
+	if fromS3 && status < 500 {
+		answeredOverHTTPS(job)
+	}
 
 	bucketExists := false
 	canList := false
 	label := ""
-	if status == 403 &&
-		strings.Contains(body, "AccessDenied") &&
-		!strings.Contains(body, "NoSuchBucket") &&
-		!strings.Contains(body, "InvalidBucketName") {
+	if status == 403 && (!res.hasBody && fromS3 || sig.denied && !sig.missing) {
 		bucketExists = true
 		label = "Found (Access Denied)"
-	} else if status == 200 &&
-		strings.Contains(body, "<ListBucketResult xmlns=") &&
-		!strings.Contains(body, "NoSuchBucket") &&
-		!strings.Contains(body, "InvalidBucketName") {
+		if fromS3 && !job.Website {
+			denied.Store(job.Bucket, true)
+		}
+	} else if status == 200 && sig.listing && !sig.missing {
 		bucketExists = true
 		canList = true
 		label = "Accessible"
@@ -483,68 +1723,35 @@ func webCheck(url string) {
 
 	// ── PUT / GET / DELETE via HTTP (skip if bucket doesn't exist or website endpoint) ──
 	putOk, getOk, delOk := false, false, false
-	isNoSuchBucket := strings.Contains(body, "NoSuchBucket")
-	isWebsiteEndpoint := strings.Contains(url, "s3-website")
-
-	if !isNoSuchBucket && !isWebsiteEndpoint {
-		objectURL := strings.TrimRight(url, "/") + "/" + testFilename
-
-		if testPut {
-			req, err := http.NewRequest("PUT", objectURL, strings.NewReader(testContent))
-			if err == nil {
-				req.Header.Set("Content-Type", "text/plain")
-				if resp, err := httpClient.Do(req); err == nil {
-					_, _ = io.Copy(io.Discard, resp.Body)
-					resp.Body.Close()
-					if resp.StatusCode == 200 || resp.StatusCode == 201 || resp.StatusCode == 204 {
-						putOk = true
-					}
-				}
-			}
-		}
-		if putOk {
-			req, err := http.NewRequest("GET", objectURL, nil)
-			if err == nil {
-				if resp, err := httpClient.Do(req); err == nil {
-					_, _ = io.Copy(io.Discard, resp.Body)
-					resp.Body.Close()
-					if resp.StatusCode == 200 {
-						getOk = true
-					}
-				}
-			}
-		}
-		if testDelete && putOk {
-			req, err := http.NewRequest("DELETE", objectURL, nil)
-			if err == nil {
-				if resp, err := httpClient.Do(req); err == nil {
-					_, _ = io.Copy(io.Discard, resp.Body)
-					resp.Body.Close()
-					if resp.StatusCode == 200 || resp.StatusCode == 204 {
-						delOk = true
-					}
-				}
-			}
-		}
+	isNoSuchBucket := sig.noSuchBucket || (status == 404 && !res.hasBody && fromS3)
+	if isNoSuchBucket && fromS3 && job.Region == "" && !job.Custom {
+		// The global endpoint's verdict covers the whole aws partition: drop
+		// the bucket's remaining (regional) jobs.
+		deadBuckets.Store(job.Bucket, true)
+	}
+
+	// The write tests only follow answers that say a bucket is likely there:
+	// a listing, a denial, or a bad request or redirect from whatever fronts a
+	// custom domain. A 404, 5xx, 405 or no response at all, a NoSuchBucket
+	// body, or S3 itself answering 400 (InvalidBucketName, bodiless on HEAD,
+	// as the CLI probe treats it) or redirecting to the bucket's real region
+	// would send the PUT to the same dead end.
+	writable := false
+	switch status {
+	case 200, 403:
+		writable = !sig.missing
+	case 301, 400:
+		writable = !fromS3
+	}
+	if writable && !job.Website {
+		putOk, getOk, delOk = runWriteTests(job.Bucket, strings.TrimRight(url, "/")+"/"+testFilename)
 	}
 
 	// ── report ──
 	if bucketExists || putOk || getOk || delOk {
-		matchedBucket := ""
-		for _, v := range allVariations {
-			if strings.Contains(url, v) {
-				matchedBucket = v
-				break
-			}
-		}
-		if matchedBucket == "" {
-			matchedBucket = baseName
+		if canList {
+			resolved.Store(job.Bucket, true)
 		}
-		markFound(matchedBucket, "")
-		recordAccess(BucketAccess{
-			Bucket: matchedBucket, Region: "", Mode: "web", URL: url,
-			CanList: canList, CanPut: putOk, CanGet: getOk, CanDel: delOk,
-		})
 
 		color := "\033[0m"
 		if strings.HasPrefix(url, "https://") {
@@ -570,12 +1777,15 @@ func webCheck(url string) {
 			finalLabel = "Access Denied (but operations work)"
 		}
 
-		mu.Lock()
-		fmt.Fprintf(os.Stdout, "\r%-80s\r", "")
-		fmt.Printf("[Web] %s: %s%s\033[0m%s\n", finalLabel, color, url, flags)
-		mu.Unlock()
+		findings <- finding{
+			access: BucketAccess{
+				Bucket: job.Bucket, Region: "", Mode: "web", URL: url,
+				CanList: canList, CanPut: putOk, CanGet: getOk, CanDel: delOk,
+			},
+			line: fmt.Sprintf("[Web] %s: %s%s\033[0m%s", finalLabel, color, url, flags),
+		}
 	} else if flagVerbose {
-		logMsg(fmt.Sprintf("[Web] Not listable: %s", url), false)
+		findings <- finding{line: "[Web] Not listable: " + url}
 	}
 }
 
@@ -590,40 +1800,85 @@ func runWebChecks() {
 	}
 	fmt.Printf("Checking web endpoints for %s...\n", bucketText)
 
-	var allURLs []string
-	for _, b := range allVariations {
-		allURLs = append(allURLs, buildEndpoints(b, "")...)
-		for _, r := range awsRegions {
-			allURLs = append(allURLs, buildEndpoints(b, r)...)
-		}
+	// Jobs are generated bucket by bucket straight into the worker queue rather
+	// than materialised up front, so memory stays at one bucket's endpoints and
+	// the first probes start immediately. Variations are already unique and each
+	// endpoint embeds its bucket, so no URL can repeat and no seen-set is needed.
+	total := 0
+	for _, rs := range planRegions {
+		total += endpointCount(rs)
 	}
 
-	total := len(allURLs)
+	// Only warm the regional hosts some bucket will actually be probed in.
+	hosts := sharedS3Hosts(plannedRegions())
+	prewarmDNS(hosts)
+	prewarmConns(hosts)
+
 	var done atomic.Int64
-	sem := make(chan struct{}, flagThreads)
+	stopProgress := startProgress("Web", &done, total)
+
+	// Fixed pool of long-lived workers fed from a channel: no goroutine or
+	// semaphore round-trip per URL, and each worker keeps reusing its pooled
+	// keep-alive connections while it drains the queue. Jobs travel in chunks
+	// so big scans pay one channel operation and one counter update per chunk.
+	chunk := jobChunkSize(total, flagThreads)
+	jobs := make(chan []webJob, flagThreads*2)
 	var wg sync.WaitGroup
+	for i := 0; i < flagThreads; i++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			for batch := range jobs {
+				for _, job := range batch {
+					if !stopAll.Load() {
+						webCheck(job)
+					}
+					jobDone(job.Bucket)
+				}
+				done.Add(int64(len(batch)))
+			}
+		}()
+	}
 
-	for _, u := range allURLs {
-		if stopAll.Load() {
+	for i, b := range allVariations {
+		bj := bucketJobs(b, planRegions[i])
+		trackTwins(b, len(bj))
+		if !enqueueJobs(jobs, bj, chunk) {
 			break
 		}
-		wg.Add(1)
-		sem <- struct{}{}
-		go func(url string) {
-			defer wg.Done()
-			defer func() { <-sem }()
-			webCheck(url)
-			d := done.Add(1)
-			progressCounter(int(d), total)
-		}(u)
 	}
+	close(jobs)
 	wg.Wait()
+	stopProgress()
 	fmt.Fprintf(os.Stdout, "\r%-80s\r", "")
 }
 
 // ────────────────────────── interactive prompts
 
+// stdinIsTerminal reports whether someone can answer a prompt.
+func stdinIsTerminal() bool {
+	fi, err := os.Stdin.Stat()
+	return err == nil && fi.Mode()&os.ModeCharDevice != 0
+}
+
+// getTestParams settles the write-test options. The -m/--no-delete/--no-write
+// flags answer them up front so scripted runs never block on stdin; only an
+// attended run falls back to the prompts.
 func getTestParams() {
+	switch {
+	case flagNoWrite:
+		testPut, testDelete = false, false
+		testContent = "No write tests enabled"
+		return
+	case flagTestMsg != "":
+		testPut, testDelete = true, !flagNoDel
+		testContent = flagTestMsg
+		return
+	case !stdinIsTerminal():
+		fmt.Println("Error: stdin is not a terminal; pass -m/--test-message or --no-write.")
+		os.Exit(1)
+	}
+
 	scanner := bufio.NewScanner(os.Stdin)
 
 	fmt.Println("\nChoose testing options:")
@@ -648,21 +1903,27 @@ func getTestParams() {
 		fmt.Print("Will perform PUT and GET checks only (no DELETE).\n\n")
 	default:
 		testPut = true
-		testDelete = true
-		fmt.Print("Will perform PUT, GET, and DELETE checks.\n\n")
+		testDelete = !flagNoDel
+		if testDelete {
+			fmt.Print("Will perform PUT, GET, and DELETE checks.\n\n")
+		} else {
+			fmt.Print("Will perform PUT and GET checks only (no DELETE).\n\n")
+		}
 	}
 
 	if testPut {
 		fmt.Println("Enter the message to put in your test file (cannot be empty):")
 		for testContent == "" {
 			fmt.Print("> ")
-			if scanner.Scan() {
-				input := strings.TrimSpace(scanner.Text())
-				if input != "" {
-					testContent = input
-				} else {
-					fmt.Println("Message cannot be empty. Please enter a message:")
-				}
+			if !scanner.Scan() {
+				// EOF: without this the loop would spin forever.
+				fmt.Println("\nError: no test message given.")
+				os.Exit(1)
+			}
+			if input := strings.TrimSpace(scanner.Text()); input != "" {
+				testContent = input
+			} else {
+				fmt.Println("Message cannot be empty. Please enter a message:")
 			}
 		}
 		fmt.Printf("Using test message: '%s'\n\n", testContent)
@@ -674,6 +1935,13 @@ func getTestParams() {
 // ────────────────────────── bucket loading
 
 func loadBucketsFromFile(path string) []string {
+	return readListFile(path, "bucket names")
+}
+
+// readListFile returns the unique non-blank, non-comment lines of path, in
+// order, exiting with an error naming what (e.g. "bucket names") if there are
+// none.
+func readListFile(path, what string) []string {
 	f, err := os.Open(path)
 	if err != nil {
 		fmt.Printf("Error: File '%s' not found.\n", path)
@@ -681,23 +1949,25 @@ func loadBucketsFromFile(path string) []string {
 	}
 	defer f.Close()
 
-	var buckets []string
+	var lines []string
+	seen := make(map[string]bool)
 	sc := bufio.NewScanner(f)
 	for sc.Scan() {
 		line := strings.TrimSpace(sc.Text())
-		if line != "" && !strings.HasPrefix(line, "#") {
-			buckets = append(buckets, line)
+		if line != "" && !strings.HasPrefix(line, "#") && !seen[line] {
+			seen[line] = true
+			lines = append(lines, line)
 		}
 	}
 	if err := sc.Err(); err != nil {
 		fmt.Printf("Error reading file '%s': %v\n", path, err)
 		os.Exit(1)
 	}
-	if len(buckets) == 0 {
-		fmt.Printf("Error: No bucket names found in '%s'.\n", path)
+	if len(lines) == 0 {
+		fmt.Printf("Error: No %s found in '%s'.\n", what, path)
 		os.Exit(1)
 	}
-	return buckets
+	return lines
 }
 
 // ────────────────────────── interactive shell helpers
@@ -1414,12 +2684,30 @@ func fetchObjectCLI(a *BucketAccess, key string, limit int64) ([]byte, error) {
 	cmd := exec.Command("aws", args...)
 	var errBuf bytes.Buffer
 	cmd.Stderr = &errBuf
-	out, err := cmd.Output()
+	stdout, err := cmd.StdoutPipe()
 	if err != nil {
-		return nil, fmt.Errorf("%v: %s", err, strings.TrimSpace(errBuf.String()))
+		return nil, err
+	}
+	if err := cmd.Start(); err != nil {
+		return nil, err
+	}
+	// Read only what the caller asked for: grep over a large object needs the
+	// first limit bytes, not the whole download held in memory and then cut.
+	var r io.Reader = stdout
+	if limit > 0 {
+		r = io.LimitReader(stdout, limit)
 	}
-	if limit > 0 && int64(len(out)) > limit {
-		out = out[:limit]
+	out, _ := io.ReadAll(r)
+	truncated := false
+	if limit > 0 && int64(len(out)) == limit {
+		// Stop the rest of the transfer; the kill's exit status is expected.
+		if n, _ := stdout.Read(make([]byte, 1)); n > 0 {
+			truncated = true
+			cmd.Process.Kill()
+		}
+	}
+	if err := cmd.Wait(); err != nil && !truncated {
+		return nil, fmt.Errorf("%v: %s", err, strings.TrimSpace(errBuf.String()))
 	}
 	return out, nil
 }
@@ -1596,7 +2884,12 @@ func shellEdit(state *ShellState, args []string) {
 		return
 	}
 
-	tmpFile := filepath.Join(tmpDir, "edit_"+filepath.Base(key))
+	dir, err := ensureTmpDir()
+	if err != nil {
+		fmt.Printf("Error creating temp directory: %v\n", err)
+		return
+	}
+	tmpFile := filepath.Join(dir, "edit_"+filepath.Base(key))
 	if err := os.WriteFile(tmpFile, data, 0644); err != nil {
 		fmt.Printf("Error writing temp file: %v\n", err)
 		return
@@ -1720,7 +3013,7 @@ func runShell() {
 	go func() {
 		<-shellSigCh
 		fmt.Println("\nExiting shell.")
-		os.RemoveAll(tmpDir)
+		cleanup()
 		os.Exit(0)
 	}()
 
@@ -1770,10 +3063,24 @@ func main() {
 	flag.BoolVar(&flagCLIOnly, "cli-only", false, "CLI checks only")
 	flag.BoolVar(&flagNameVar, "n", false, "Search for bucket name variations (dev-, -prod, etc.)")
 	flag.BoolVar(&flagNameVar, "name-variations", false, "Search for bucket name variations")
+	flag.StringVar(&flagVarFile, "f", "", "File of variation patterns, one per line with {b} for the name (implies -n)")
+	flag.StringVar(&flagVarFile, "variations-file", "", "File of variation patterns, one per line with {b} for the name (implies -n)")
 	flag.BoolVar(&flagVerbose, "v", false, "Show all access attempts (verbose mode)")
 	flag.BoolVar(&flagVerbose, "verbose", false, "Show all access attempts (verbose mode)")
-	flag.IntVar(&flagThreads, "t", 30, "Concurrent threads for web checks (default: 30)")
-	flag.IntVar(&flagThreads, "threads", 30, "Concurrent threads for web checks")
+	threads := defaultThreads()
+	flag.IntVar(&flagThreads, "t", threads, "Concurrent threads for web checks")
+	flag.IntVar(&flagThreads, "threads", threads, "Concurrent threads for web checks")
+	flag.BoolVar(&flagAllRegs, "a", false, "Also scan China, GovCloud and ISO regions")
+	flag.BoolVar(&flagAllRegs, "all-regions", false, "Also scan China, GovCloud and ISO regions")
+	flag.BoolVar(&flagAllRegs, "include-restricted", false, "Same as -a/--all-regions")
+	flag.BoolVar(&flagExhaust, "e", false, "Probe every endpoint in every region: no skipping after a listable or denied endpoint, for names S3 reports as nonexistent, or outside a bucket's known region")
+	flag.BoolVar(&flagExhaust, "exhaustive", false, "Probe every endpoint in every region: no skipping after a listable or denied endpoint, for names S3 reports as nonexistent, or outside a bucket's known region")
+	flag.BoolVar(&flagRootDom, "d", false, "Also probe the bucket name itself as a hostname (custom-domain buckets)")
+	flag.BoolVar(&flagRootDom, "probe-root-domain", false, "Also probe the bucket name itself as a hostname (custom-domain buckets)")
+	flag.StringVar(&flagTestMsg, "m", "", "Content of the write-test file (skips the interactive prompts)")
+	flag.StringVar(&flagTestMsg, "test-message", "", "Content of the write-test file (skips the interactive prompts)")
+	flag.BoolVar(&flagNoDel, "no-delete", false, "Test PUT and GET but leave the test file in place")
+	flag.BoolVar(&flagNoWrite, "no-write", false, "Skip all write tests (no PUT, GET, or DELETE)")
 
 	flag.Usage = func() {
 		fmt.Fprintf(os.Stderr, `0xS3 – scan for publicly-listable S3 buckets across regions.
@@ -1786,6 +3093,7 @@ Usage:
   %[1]s -l buckets.txt -n -w      # Check all buckets from file with name variations
   %[1]s -b examplebucket -w       # Web checks only
   %[1]s -b examplebucket -c       # CLI checks only
+  %[1]s -l buckets.txt -w -m "pentest by ACME" --no-delete   # Unattended run
 
 Note: When using -l flag, -w or -c must be specified to prevent accidental resource-intensive scans.
 
@@ -1810,6 +3118,14 @@ Flags:
 		fmt.Println("Error: -w and -c are mutually exclusive.")
 		os.Exit(1)
 	}
+	if flagNoWrite && (flagTestMsg != "" || flagNoDel) {
+		fmt.Println("Error: --no-write cannot be combined with -m/--test-message or --no-delete.")
+		os.Exit(1)
+	}
+	if flagThreads < 1 {
+		fmt.Println("Error: -t/--threads must be at least 1.")
+		os.Exit(1)
+	}
 
 	// ── load bucket names ──
 	if flagBucket != "" {
@@ -1818,6 +3134,10 @@ Flags:
 		baseBuckets = loadBucketsFromFile(flagList)
 	}
 	baseName = baseBuckets[0]
+	if flagVarFile != "" {
+		variationPatterns = loadVariationPatterns(flagVarFile)
+		flagNameVar = true
+	}
 
 	// ── validate -l requires -w or -c ──
 	if flagList != "" && !flagWebOnly && !flagCLIOnly {
@@ -1831,45 +3151,42 @@ Flags:
 
 	doWeb = !flagCLIOnly
 	doCLI = !flagWebOnly
+	if flagAllRegs {
+		awsRegions = append(append([]string{}, publicRegions...), restrictedRegions...)
+	}
+	if flagRootDom {
+		globalEndpointTmpls = append([]string{rootDomainTmpl}, globalEndpointTmpls...)
+	}
 	allVariations = buildVariations()
+	initEndpointForms()
 
 	// ── check AWS CLI availability ──
+	// CLI-mode checks run in-process; only the shell drives the aws binary
+	// for buckets found that way.
 	if doCLI {
 		if _, err := exec.LookPath("aws"); err != nil {
-			fmt.Println("Error: AWS CLI not found. Install or use -w/--web-only.")
-			os.Exit(1)
+			fmt.Println("Warning: AWS CLI not found. CLI-mode checks still run, but shell commands on buckets they find will fail.")
 		}
 	}
 
-	// ── temp directory ──
-	var err error
-	tmpDir, err = os.MkdirTemp("", "s3chk_")
-	if err != nil {
-		fmt.Println("Error creating temp directory:", err)
-		os.Exit(1)
-	}
-	testFilePath = filepath.Join(tmpDir, testFilename)
-	defer os.RemoveAll(tmpDir)
+	defer cleanup()
 
-	// ── HTTP client (skip TLS verification, matching Python behaviour) ──
-	httpClient = &http.Client{
-		Timeout: 15 * time.Second,
-		Transport: &http.Transport{
-			TLSClientConfig:     &tls.Config{InsecureSkipVerify: true},
-			MaxIdleConns:        100,
-			MaxIdleConnsPerHost: 10,
-		},
-	}
+	// ── HTTP client (pooled keep-alive, skip TLS verification) ──
+	httpClient = newHTTPClient(flagThreads)
+	scanClient = newScanClient(httpClient)
 
 	// ── signal handling (first Ctrl-C = graceful, second = force) ──
+	scanCtx, cancelScan = context.WithCancel(context.Background())
+	defer cancelScan()
 	sigCh = make(chan os.Signal, 2)
 	signal.Notify(sigCh, syscall.SIGINT, syscall.SIGTERM)
 	go func() {
 		<-sigCh
 		fmt.Println("\nSearch interrupted by user.")
 		stopAll.Store(true)
+		cancelScan()
 		<-sigCh
-		os.RemoveAll(tmpDir)
+		cleanup()
 		os.Exit(130)
 	}()
 
@@ -1906,16 +3223,33 @@ Flags:
 		fmt.Println("Verbose mode: ON")
 	}
 
-	// ── interactive test params ──
+	// ── test params (flags, else prompt) ──
 	getTestParams()
 
 	// ── run checks ──
+	// Region discovery feeds both phases; after it, the CLI and web sweeps are
+	// independent I/O and run side by side.
+	fmt.Printf("Resolving bucket regions for %d name(s)...\n", len(allVariations))
+	discoverRegions(allVariations)
+	planScan()
+	stopReporter := startReporter()
+	var phases sync.WaitGroup
 	if doCLI {
-		runCLIChecks()
+		phases.Add(1)
+		go func() {
+			defer phases.Done()
+			runCLIChecks()
+		}()
 	}
 	if doWeb {
-		runWebChecks()
-	}
+		phases.Add(1)
+		go func() {
+			defer phases.Done()
+			runWebChecks()
+		}()
+	}
+	phases.Wait()
+	stopReporter()
 
 	// ── summary ──
 	// Determine which buckets have real capabilities vs just "exists (access denied)"
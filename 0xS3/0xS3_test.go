@@ -0,0 +1,198 @@
+package main
+
+import (
+	"context"
+	"fmt"
+	"net"
+	"net/http"
+	"net/http/httptest"
+	"strconv"
+	"strings"
+	"sync"
+	"sync/atomic"
+	"testing"
+	"time"
+)
+
+// saveGlobals snapshots the scan state a test is about to overwrite and
+// restores it, along with every per-bucket entry for bucket, when t finishes.
+func saveGlobals(t *testing.T, bucket string) {
+	tmpls, forms, rootDom := globalEndpointTmpls, endpointForms, flagRootDom
+	put, del, hc, sc := testPut, testDelete, httpClient, scanClient
+	found, access, fs := foundBuckets, accessList, findings
+	t.Cleanup(func() {
+		globalEndpointTmpls, endpointForms, flagRootDom = tmpls, forms, rootDom
+		testPut, testDelete, httpClient, scanClient = put, del, hc, sc
+		foundBuckets, accessList, findings = found, access, fs
+		for _, m := range []*sync.Map{&deadBuckets, &resolved, &denied, &bucketRegion, &writeLocks, &httpsAnswered} {
+			m.Delete(bucket)
+		}
+	})
+}
+
+// A name S3 reports as nonexistent may still be a custom domain in front of a
+// bucket with another name; -d must keep probing it as a hostname.
+func TestDeadNameStillProbesRootDomain(t *testing.T) {
+	srv := httptest.NewServer(http.HandlerFunc(func(w http.ResponseWriter, r *http.Request) {
+		w.Header().Set("Content-Type", "application/xml")
+		_, _ = w.Write([]byte(`<?xml version="1.0" encoding="UTF-8"?>` +
+			`<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/"><Name>assets</Name></ListBucketResult>`))
+	}))
+	defer srv.Close()
+	name := strings.TrimPrefix(srv.URL, "http://")
+
+	saveGlobals(t, name)
+	accessList, foundBuckets = nil, make(map[string]map[string]bool)
+	flagRootDom = true
+	globalEndpointTmpls = append([]string{rootDomainTmpl}, globalEndpointTmpls...)
+	initEndpointForms()
+	testPut = false
+	httpClient = newHTTPClient(1)
+	scanClient = newScanClient(httpClient)
+	deadBuckets.Store(name, true)
+
+	var custom int
+	stop := startReporter()
+	for _, job := range bucketJobs(name, regionsFor(name)) {
+		if job.Custom {
+			custom++
+		} else if !strings.Contains(job.URL, "amazonaws.com") {
+			t.Errorf("S3 form %s is not tagged as an S3 endpoint", job.URL)
+			continue
+		}
+		webCheck(job)
+	}
+	stop()
+
+	if custom != 2 {
+		t.Fatalf("got %d root-domain jobs, want 2 (https and http)", custom)
+	}
+	if len(accessList) != 1 || accessList[0].URL != srv.URL || !accessList[0].CanList {
+		t.Fatalf("accessList = %+v, want one listable hit at %s", accessList, srv.URL)
+	}
+}
+
+// Rotation must try every IPv4 address before any IPv6 one, so a host with
+// broken IPv6 never waits out a dial timeout while IPv4 is left untried.
+func TestDialOrderPrefersIPv4(t *testing.T) {
+	ha := cacheAddrs("dual.test", []string{"2600::1", "1.1.1.1", "2600::2", "2.2.2.2"})
+	defer dnsCache.Delete("dual.test")
+	want := [][]string{
+		{"1.1.1.1", "2.2.2.2", "2600::1", "2600::2"},
+		{"2.2.2.2", "1.1.1.1", "2600::2", "2600::1"},
+		{"1.1.1.1", "2.2.2.2", "2600::1", "2600::2"},
+	}
+	for i, w := range want {
+		if got := ha.dialOrder("tcp"); strings.Join(got, ",") != strings.Join(w, ",") {
+			t.Errorf("dial %d: got %v, want %v", i, got, w)
+		}
+	}
+	if got := ha.dialOrder("tcp6"); len(got) != 2 || got[0] == "1.1.1.1" || got[0] == "2.2.2.2" {
+		t.Errorf("tcp6 dial got %v, want IPv6 addresses only", got)
+	}
+}
+
+// A host whose cached addresses all refuse connections is forgotten, so the
+// next dial resolves it again instead of failing the same way.
+func TestDialCachedDropsDeadEntry(t *testing.T) {
+	ln, err := net.Listen("tcp", "127.0.0.1:0")
+	if err != nil {
+		t.Fatal(err)
+	}
+	port := ln.Addr().(*net.TCPAddr).Port
+	ln.Close()
+
+	cacheAddrs("gone.test", []string{"127.0.0.1"})
+	t.Cleanup(func() { dnsCache.Delete("gone.test") })
+	addr := net.JoinHostPort("gone.test", strconv.Itoa(port))
+	if _, err := dialCached(context.Background(), &net.Dialer{}, "tcp", addr); err == nil {
+		t.Fatal("dial to a closed port succeeded")
+	}
+	if _, ok := dnsCache.Load("gone.test"); ok {
+		t.Error("entry kept after every address failed to dial")
+	}
+}
+
+// Slots of hosts that have gone quiet are swept instead of piling up for
+// every virtual-hosted name a scan touches.
+func TestHostPacerSweepsIdleHosts(t *testing.T) {
+	p := newHostPacer(1000, 1)
+	ctx := context.Background()
+	_ = p.wait(ctx, "old.example")
+	sh := p.shard("old.example")
+	sh.mu.Lock()
+	sh.next["old.example"] = time.Now().Add(-time.Minute)
+	sh.swept = time.Time{}
+	sh.mu.Unlock()
+
+	// Another host in the same shard triggers the sweep.
+	other := ""
+	for i := 0; other == ""; i++ {
+		if h := fmt.Sprintf("b%d.example", i); p.shard(h) == sh {
+			other = h
+		}
+	}
+	_ = p.wait(ctx, other)
+	sh.mu.Lock()
+	defer sh.mu.Unlock()
+	if _, ok := sh.next["old.example"]; ok {
+		t.Error("idle host slot survived the sweep")
+	}
+	if _, ok := sh.next[other]; !ok {
+		t.Error("active host slot was swept")
+	}
+}
+
+// An https verdict settles its http twin, and a bucket's twin set is gone once
+// all of its jobs have run, whether or not every entry was consumed.
+func TestHTTPSTwinsDroppedWithBucket(t *testing.T) {
+	const b = "twins-bucket"
+	saveGlobals(t, b)
+	jobs := []webJob{
+		{URL: "https://" + b + ".s3.amazonaws.com", Bucket: b},
+		{URL: "https://s3.amazonaws.com/" + b, Bucket: b},
+		{URL: "http://" + b + ".s3.amazonaws.com", Bucket: b},
+	}
+	trackTwins(b, len(jobs))
+	answeredOverHTTPS(jobs[0])
+	answeredOverHTTPS(jobs[1]) // its http twin never runs
+	if !settledOverHTTPS(jobs[2]) {
+		t.Error("http twin not settled by its https verdict")
+	}
+	for _, j := range jobs {
+		jobDone(j.Bucket)
+	}
+	if _, ok := httpsAnswered.Load(b); ok {
+		t.Error("twin set kept after the bucket's last job")
+	}
+}
+
+// A 400 from S3 itself (InvalidBucketName) rules the endpoint out for write
+// tests, as in the CLI probe; a 400 from some other front end does not.
+func TestWriteTestsSkipS3BadRequest(t *testing.T) {
+	for _, tc := range []struct {
+		fromS3  bool
+		wantPUT bool
+	}{{true, false}, {false, true}} {
+		var puts atomic.Int32
+		srv := httptest.NewServer(http.HandlerFunc(func(w http.ResponseWriter, r *http.Request) {
+			if r.Method == "PUT" {
+				puts.Add(1)
+			}
+			if tc.fromS3 {
+				w.Header().Set("x-amz-request-id", "TEST")
+			}
+			w.WriteHeader(http.StatusBadRequest)
+		}))
+		name := strings.TrimPrefix(srv.URL, "http://")
+		saveGlobals(t, name)
+		testPut, testDelete = true, false
+		httpClient = newHTTPClient(1)
+		scanClient = newScanClient(httpClient)
+		webCheck(webJob{URL: srv.URL, Bucket: name, Custom: true})
+		srv.Close()
+		if got := puts.Load() > 0; got != tc.wantPUT {
+			t.Errorf("400 fromS3=%v: PUT sent = %v, want %v", tc.fromS3, got, tc.wantPUT)
+		}
+	}
+}